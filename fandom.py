@@ -4,23 +4,125 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import hashlib
+import itertools
 import json
+import os
 import random
 import shutil
 import time
 import urllib.parse
+from contextlib import aclosing
 from pathlib import Path
-from typing import Any, Dict, Iterator, List
+from typing import (
+    IO,
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Set,
+)
 
 import httpx
+import ijson
+
+try:
+    import orjson
+except ImportError:  # optional speedup; fall back to the stdlib encoder
+    orjson = None
+
+__all__ = [
+    "ApiLagError",
+    "DownloadChecksumError",
+    "DownloadIncompleteError",
+    "DownloadNotFoundError",
+    "build_parser",
+    "command_all_media",
+    "command_all_pages",
+    "command_download_media",
+    "command_view_next_download",
+    "iter_all_images",
+    "iter_all_pages",
+    "main",
+]
 
 API_TIMEOUT = 30
-REQUEST_DELAY = 0.2  # seconds between paged requests to stay polite
+USER_AGENT = "fandom-cli/0.1 (+https://github.com/user/project)"
+# One HTTP/2 connection multiplexes paged API calls; the pool bound only matters
+# if the server negotiates HTTP/1.1 instead.
+API_LIMITS = httpx.Limits(max_connections=16, max_keepalive_connections=8)
+API_RATE = 5.0  # sustained api.php requests per second, across all crawl chains
+API_BURST = 8  # requests allowed back to back before API_RATE applies
+API_MAXLAG = 5  # seconds of replication lag before MediaWiki asks us to wait
+API_RETRIES = 5  # attempts per api.php request while the server says to back off
 MEDIA_DELAY_RANGE = (1.0, 10.0)
 DOWNLOAD_DELAY_RANGE = (1.0, 20.0)
 DOWNLOAD_LOG_INTERVAL = 50
+DOWNLOAD_CONCURRENCY = 8
+# Streaming throughput plateaus somewhere between 100 KiB and 1 MiB per chunk;
+# smaller chunks mostly add per-iteration Python overhead.
+DOWNLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+DOWNLOAD_WRITE_BATCH = 4 << 20  # bytes gathered before each writev
 MAX_BACKOFF_SECONDS = 2 * 60 * 60  # 2 hours
+CHECKSUM_RETRIES = 2  # re-downloads after a SHA-1 mismatch before skipping the file
 MIN_FREE_BYTES = 10 * 1024**3  # 10 GB
+DISK_USAGE_INTERVAL = 60.0  # seconds to reuse a free-space reading
+PAGE_LIST = "all_page_urls.jsonl"
+PAGE_LIST_JSON = "all_page_urls.json"  # optional array form, see --finalize-json
+API_CACHE = ".api-cache"  # per-command directories of cached API responses
+MEDIA_MANIFEST = "all_media_urls.jsonl"
+LEGACY_MEDIA_MANIFEST = "all_media_urls.json"  # JSON array written by older versions
+# When the first allpages request has a continuation, all-pages splits the
+# remaining title space at these letters and pages through each range as an
+# independent continuation chain.
+PAGE_SHARD_BOUNDS = tuple("BCDEFGHIJKLMNOPQRSTUVWXYZ")
+PAGE_SHARD_CONCURRENCY = 4
+
+
+def _json_dumps(obj: Any, indent: bool = True) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(obj, indent=2).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def _json_loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+_URL_SAFE = b":/%"
+# Characters quote_from_bytes() never escapes with _URL_SAFE; deleting them
+# leaves an empty string exactly when a slug needs no quoting at all.
+_URL_PLAIN = str.maketrans(
+    "", "", "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_.-~:/%"
+)
+
+
+def _wiki_url_prefix(wiki: str) -> str:
+    return f"https://{wiki}.fandom.com/wiki/"
+
+
+def _wiki_url(prefix: str, title: str) -> str:
+    slug = title.replace(" ", "_")
+    if slug.isascii() and not slug.translate(_URL_PLAIN):
+        return prefix + slug
+    return prefix + urllib.parse.quote_from_bytes(slug.encode("utf-8"), safe=_URL_SAFE)
+
+
+class ApiLagError(Exception):
+    """Raised when a wiki keeps answering with maxlag errors after every retry."""
+
+    def __init__(self, wiki: str, attempts: int) -> None:
+        super().__init__(f"{wiki} stayed over maxlag after {attempts} attempts")
+        self.wiki = wiki
+        self.attempts = attempts
 
 
 class DownloadNotFoundError(Exception):
@@ -31,7 +133,261 @@ class DownloadNotFoundError(Exception):
         self.url = url
 
 
-def iter_all_pages(wiki: str, client: httpx.Client) -> Iterator[Dict[str, str]]:
+class DownloadChecksumError(Exception):
+    """Raised when a downloaded file does not match the SHA-1 in the manifest."""
+
+    def __init__(self, url: str, expected: str, actual: str) -> None:
+        super().__init__(f"SHA-1 mismatch (expected {expected}, got {actual}): {url}")
+        self.url = url
+        self.expected = expected
+        self.actual = actual
+
+
+class DownloadIncompleteError(Exception):
+    """Raised when fewer bytes arrived than the server said it would send."""
+
+    def __init__(self, url: str, received: int, expected: int) -> None:
+        super().__init__(f"Received {received} of {expected} bytes: {url}")
+        self.url = url
+        self.received = received
+        self.expected = expected
+
+
+class _TokenBucket:
+    """Async token bucket: bursts of up to ``burst`` calls, ``rate`` per second after."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+def _api_client() -> httpx.AsyncClient:
+    """Shared client for api.php crawls: HTTP/2 with a bounded keep-alive pool.
+
+    httpx's default Accept-Encoding already asks for gzip, and for br whenever
+    brotli is installed, so the highly repetitive JSON is compressed on the wire.
+    """
+    # One bucket per client caps the combined rate of every crawl chain using
+    # it, without making concurrent requests wait on each other's delays.
+    bucket = _TokenBucket(API_RATE, API_BURST)
+
+    async def throttle(request: httpx.Request) -> None:
+        await bucket.acquire()
+
+    return httpx.AsyncClient(
+        timeout=API_TIMEOUT,
+        headers={"User-Agent": USER_AGENT},
+        http2=True,
+        limits=API_LIMITS,
+        event_hooks={"request": [throttle]},
+    )
+
+
+class _AsyncChunkReader:
+    """Async file-like view of a byte-chunk iterator, for ijson."""
+
+    def __init__(self, chunks: AsyncIterator[bytes]) -> None:
+        self._chunks = chunks
+
+    async def read(self, size: int = -1) -> bytes:
+        if size == 0:
+            return b""
+        return await anext(self._chunks, b"")
+
+
+def _retry_after(resp: httpx.Response) -> float:
+    value = resp.headers.get("Retry-After", "")
+    return float(value) if value.isdigit() else float(API_MAXLAG)
+
+
+def _max_age(cache_control: str) -> int:
+    for directive in cache_control.split(","):
+        name, _, value = directive.strip().partition("=")
+        if name.lower() == "max-age" and value.isdigit():
+            return int(value)
+    return 0
+
+
+class _ResponseCache:
+    """Conditional-request cache for api.php responses, kept per wiki.
+
+    Entries are keyed by a hash of the request URL. Each command owns a
+    directory with one file per cached payload, written as responses arrive,
+    and a small index of validators (ETag / Last-Modified) and max-age
+    expiries; only that index is held in memory. On save only the entries
+    touched during the run are kept, so stale continuation pages drop out.
+    """
+
+    def __init__(self, path: Path, section: str) -> None:
+        self.path = path / section
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._index_path = self.path / "index.json"
+        self._previous: Dict[str, Dict[str, Any]] = {}
+        if self._index_path.exists():
+            try:
+                self._previous = _json_loads(self._index_path.read_bytes())
+            except ValueError:
+                print(f"Ignoring unreadable response cache at {self.path}")
+        self._current: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def key(url: httpx.URL) -> str:
+        return hashlib.sha1(str(url).encode("utf-8"), usedforsecurity=False).hexdigest()
+
+    def _payload_path(self, key: str) -> Path:
+        return self.path / f"{key}.json"
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        entry = self._current.get(key) or self._previous.get(key)
+        if entry is None or not self._payload_path(key).exists():
+            return None
+        self._current[key] = entry
+        return entry
+
+    def payload(self, key: str) -> Dict[str, Any]:
+        return _json_loads(self._payload_path(key).read_bytes())
+
+    def put(
+        self, key: str, resp: httpx.Response, payload: Dict[str, Any] | None
+    ) -> None:
+        """Record a response; ``payload`` is None when the stored copy is still current."""
+        previous = self._current.pop(key, None) or {}
+        cache_control = resp.headers.get("Cache-Control", "")
+        if "no-store" in cache_control.lower():
+            return
+        etag = resp.headers.get("ETag") or previous.get("etag")
+        last_modified = resp.headers.get("Last-Modified") or previous.get(
+            "last_modified"
+        )
+        max_age = _max_age(cache_control)
+        if not (etag or last_modified or max_age):
+            return
+        if payload is not None:
+            path = self._payload_path(key)
+            tmp_path = path.with_suffix(".part")
+            tmp_path.write_bytes(_json_dumps(payload, indent=False))
+            tmp_path.replace(path)
+        self._current[key] = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "expires": time.time() + max_age,
+        }
+
+    def save(self, prune: bool = True) -> None:
+        if prune:
+            index = self._current
+            for path in self.path.glob("*.json"):
+                if path != self._index_path and path.stem not in index:
+                    path.unlink()
+        else:
+            index = {**self._previous, **self._current}
+        tmp_path = self._index_path.with_suffix(".part")
+        tmp_path.write_bytes(_json_dumps(index, indent=False))
+        tmp_path.replace(self._index_path)
+
+
+async def _iter_api_query(
+    client: httpx.AsyncClient,
+    wiki: str,
+    params: Dict[str, str],
+    delay: Callable[[], float],
+    cache: _ResponseCache | None = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield each continuation page of an API query, one request ahead.
+
+    As soon as a response arrives the next request is scheduled (after the
+    polite delay) in the background, so the wait overlaps with whatever the
+    caller does with the current page. Requests carry ``maxlag``; when the
+    server answers with a maxlag error, 429 or 503 the request is retried
+    after its Retry-After. With a cache, requests are made conditional and
+    unchanged pages come back from disk on a 304.
+    """
+    # The static part of the query string is encoded once per crawl; each
+    # request only appends its continuation keys.
+    base = (
+        f"https://{wiki}.fandom.com/api.php?"
+        f"{urllib.parse.urlencode(dict(params, maxlag=str(API_MAXLAG)))}"
+    )
+
+    async def fetch(request_url: httpx.URL, wait: float) -> Dict[str, Any]:
+        key = ""
+        cached = None
+        headers: Dict[str, str] = {}
+        if cache is not None:
+            key = cache.key(request_url)
+            cached = cache.get(key)
+            if cached is not None:
+                if cached["expires"] > time.time():
+                    return cache.payload(key)
+                if cached.get("etag"):
+                    headers["If-None-Match"] = cached["etag"]
+                if cached.get("last_modified"):
+                    headers["If-Modified-Since"] = cached["last_modified"]
+        for attempt in itertools.count(1):
+            if wait:
+                await asyncio.sleep(wait)
+            unchanged = False
+            async with client.stream("GET", request_url, headers=headers) as resp:
+                if cached is not None and resp.status_code == 304:
+                    unchanged = True
+                    payload = cache.payload(key)
+                elif resp.status_code in (429, 503) and attempt < API_RETRIES:
+                    wait = _retry_after(resp)
+                    print(f"[api] {wiki} returned {resp.status_code}; retrying in {wait:g}s")
+                    continue
+                else:
+                    resp.raise_for_status()
+                    if orjson is not None:
+                        # One response is at most a few hundred KB, and orjson
+                        # parses the whole body several times faster than ijson.
+                        payload = orjson.loads(await resp.aread())
+                    else:
+                        # Decode straight from the network chunks: neither the
+                        # whole body nor a decoded copy of it is held in memory.
+                        payload = await anext(
+                            ijson.items(
+                                _AsyncChunkReader(resp.aiter_bytes()), "", use_float=True
+                            )
+                        )
+            if payload.get("error", {}).get("code") != "maxlag":
+                break
+            if attempt >= API_RETRIES:
+                raise ApiLagError(wiki, attempt)
+            wait = _retry_after(resp)
+            print(f"[api] {wiki} is lagged; retrying in {wait:g}s")
+        if cache is not None:
+            cache.put(key, resp, None if unchanged else payload)
+        return payload
+
+    pending: asyncio.Task[Dict[str, Any]] | None = asyncio.create_task(
+        fetch(httpx.URL(base), 0)
+    )
+    try:
+        while pending is not None:
+            payload = await pending
+            pending = None
+            if "continue" in payload:
+                next_url = httpx.URL(f"{base}&{urllib.parse.urlencode(payload['continue'])}")
+                pending = asyncio.create_task(fetch(next_url, delay()))
+            yield payload
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+def _allpages_params(start: str | None = None, stop: str | None = None) -> Dict[str, str]:
     params: Dict[str, str] = {
         "action": "query",
         "format": "json",
@@ -39,20 +395,49 @@ def iter_all_pages(wiki: str, client: httpx.Client) -> Iterator[Dict[str, str]]:
         "aplimit": "max",
         "apnamespace": "0",
     }
-    cont: Dict[str, str] = {}
-    while True:
-        resp = client.get(
-            f"https://{wiki}.fandom.com/api.php",
-            params={**params, **cont},
+    if start is not None:
+        params["apfrom"] = start
+    if stop is not None:
+        params["apto"] = stop
+    return params
+
+
+async def iter_all_pages(
+    wiki: str,
+    client: httpx.AsyncClient,
+    cache: _ResponseCache | None = None,
+    start: str | None = None,
+    stop: str | None = None,
+) -> AsyncIterator[Dict[str, str]]:
+    """Yield namespace 0 pages, optionally only titles in ``[start, stop)``."""
+    async with aclosing(
+        _iter_api_query(client, wiki, _allpages_params(start, stop), lambda: 0.0, cache)
+    ) as payloads:
+        async for payload in payloads:
+            for page in payload["query"]["allpages"]:
+                # apto is inclusive; a title equal to it belongs to the next range.
+                if page["title"] != stop:
+                    yield page
+
+
+async def iter_all_images(
+    wiki: str, client: httpx.AsyncClient, cache: _ResponseCache | None = None
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield the uploaded files of a wiki one API page (batch) at a time."""
+    params: Dict[str, str] = {
+        "action": "query",
+        "format": "json",
+        "list": "allimages",
+        "aiprop": "url|mime|size|sha1|timestamp|user|comment",
+        "ailimit": "max",
+    }
+    async with aclosing(
+        _iter_api_query(
+            client, wiki, params, lambda: random.uniform(*MEDIA_DELAY_RANGE), cache
         )
-        resp.raise_for_status()
-        payload = resp.json()
-        for page in payload["query"]["allpages"]:
-            yield page
-        if "continue" not in payload:
-            break
-        cont = payload["continue"]
-        time.sleep(REQUEST_DELAY)
+    ) as payloads:
+        async for payload in payloads:
+            yield payload["query"]["allimages"]
 
 
 def command_all_pages(args: argparse.Namespace) -> None:
@@ -60,22 +445,122 @@ def command_all_pages(args: argparse.Namespace) -> None:
         f"[all-pages] Fetching namespace 0 pages for {args.wiki}. "
         "Logs will appear roughly every request."
     )
-    pages: List[Dict[str, str]] = []
-    headers = {"User-Agent": "fandom-cli/0.1 (+https://github.com/user/project)"}
-    with httpx.Client(timeout=API_TIMEOUT, headers=headers) as client:
-        for entry in iter_all_pages(args.wiki, client):
-            title = entry["title"]
-            slug = title.replace(" ", "_")
-            entry["url"] = (
-                f"https://{args.wiki}.fandom.com/wiki/"
-                f"{urllib.parse.quote(slug, safe=':/%')}"
-            )
-            pages.append(entry)
     out_dir = Path("fandom-data") / args.wiki
     out_dir.mkdir(parents=True, exist_ok=True)
-    out_file = out_dir / "all_page_urls.json"
-    out_file.write_text(json.dumps(pages, indent=2), encoding="utf-8")
-    print(f"Wrote {len(pages)} pages to {out_file}")
+    out_file = out_dir / PAGE_LIST
+    # The first API page goes to shard 00; any remaining title ranges stream
+    # into their own shard files as pages arrive. The shards are concatenated
+    # in order at the end, so the output stays sorted.
+    shard_dir = out_dir / ".page-shards"
+    if shard_dir.exists():
+        shutil.rmtree(shard_dir)
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    cache = _ResponseCache(out_dir / API_CACHE, "allpages")
+    url_prefix = _wiki_url_prefix(args.wiki)
+    count = 0
+
+    def write_pages(fh: IO[bytes], pages: Iterable[Dict[str, Any]]) -> None:
+        nonlocal count
+        for entry in pages:
+            title = entry["title"]
+            record = {
+                "pageid": entry["pageid"],
+                "ns": entry["ns"],
+                "title": title,
+                "url": _wiki_url(url_prefix, title),
+            }
+            fh.write(_json_dumps(record, indent=False) + b"\n")
+            count += 1
+
+    async def fetch_shard(
+        client: httpx.AsyncClient,
+        slots: asyncio.Semaphore,
+        path: Path,
+        start: str | None,
+        stop: str | None,
+    ) -> None:
+        async with slots:
+            with path.open("wb") as fh:
+                async with aclosing(
+                    iter_all_pages(args.wiki, client, cache, start, stop)
+                ) as pages:
+                    async for entry in pages:
+                        write_pages(fh, (entry,))
+
+    async def run() -> None:
+        async with _api_client() as client:
+            # One unbounded request first: small wikis are done after it, and
+            # larger ones only fan out over the titles past its continue point.
+            async with aclosing(
+                _iter_api_query(client, args.wiki, _allpages_params(), lambda: 0.0, cache)
+            ) as payloads:
+                # Closed without awaiting anything else, so the prefetched
+                # continuation is cancelled before it starts.
+                first = await anext(payloads)
+            with (shard_dir / "shard-00.jsonl").open("wb") as fh:
+                write_pages(fh, first["query"]["allpages"])
+            if "continue" not in first:
+                return
+            resume = first["continue"]["apcontinue"]
+            bounds = [resume, *(b for b in PAGE_SHARD_BOUNDS if b > resume), None]
+            slots = asyncio.Semaphore(max(1, args.concurrency))
+            tasks = [
+                asyncio.create_task(
+                    fetch_shard(
+                        client, slots, shard_dir / f"shard-{idx:02d}.jsonl", start, stop
+                    )
+                )
+                for idx, (start, stop) in enumerate(zip(bounds, bounds[1:]), 1)
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+
+    try:
+        asyncio.run(run())
+    except BaseException as exc:
+        cache.save(prune=False)
+        if isinstance(exc, (httpx.HTTPError, ApiLagError)):
+            print(f"Stopped after {count} pages; partial shards left in {shard_dir}.")
+        raise
+    cache.save()
+
+    tmp_file = out_file.with_suffix(out_file.suffix + ".part")
+    with tmp_file.open("wb") as out:
+        for path in sorted(shard_dir.glob("shard-*.jsonl")):
+            with path.open("rb") as shard:
+                shutil.copyfileobj(shard, out)
+    tmp_file.replace(out_file)
+    shutil.rmtree(shard_dir)
+    print(f"Wrote {count} pages to {out_file}")
+
+    if args.finalize_json:
+        json_file = out_dir / PAGE_LIST_JSON
+        tmp_json = json_file.with_suffix(json_file.suffix + ".part")
+        # Records are copied across one at a time, so the array is never
+        # built in memory; only --pretty has to re-encode each of them.
+        written = 0
+        with out_file.open("rb") as src, tmp_json.open("wb", buffering=1 << 20) as dst:
+            dst.write(b"[")
+            for line in src:
+                line = line.strip()
+                if not line:
+                    continue
+                if args.pretty:
+                    dst.write(b",\n  " if written else b"\n  ")
+                    dst.write(_json_dumps(_json_loads(line)).replace(b"\n", b"\n  "))
+                else:
+                    if written:
+                        dst.write(b",")
+                    dst.write(line)
+                written += 1
+            dst.write(b"\n]" if args.pretty and written else b"]")
+        tmp_json.replace(json_file)
+        print(f"Wrote {written} pages to {json_file}")
 
 
 def command_all_media(args: argparse.Namespace) -> None:
@@ -83,7 +568,6 @@ def command_all_media(args: argparse.Namespace) -> None:
         f"[all-media] Fetching all files for {args.wiki}. "
         "Writing chunks to disk and logging every 10 chunks."
     )
-    headers = {"User-Agent": "fandom-cli/0.1 (+https://github.com/user/project)"}
     out_dir = Path("fandom-data") / args.wiki
     out_dir.mkdir(parents=True, exist_ok=True)
     tmp_dir = out_dir / ".media-chunks"
@@ -91,97 +575,97 @@ def command_all_media(args: argparse.Namespace) -> None:
         shutil.rmtree(tmp_dir)
     tmp_dir.mkdir(parents=True, exist_ok=True)
 
-    params: Dict[str, str] = {
-        "action": "query",
-        "format": "json",
-        "list": "allimages",
-        "aiprop": "url|mime|size|sha1|timestamp|user|comment",
-        "ailimit": "max",
-    }
-    cont: Dict[str, str] = {}
+    cache = _ResponseCache(out_dir / API_CACHE, "allimages")
+    url_prefix = _wiki_url_prefix(args.wiki)
     chunk_idx = 0
     total = 0
-    completed = False
-
-    with httpx.Client(timeout=API_TIMEOUT, headers=headers) as client:
-        while True:
-            resp = client.get(
-                f"https://{args.wiki}.fandom.com/api.php",
-                params={**params, **cont},
-            )
-            resp.raise_for_status()
-            payload = resp.json()
-            images = payload["query"]["allimages"]
-
-            if args.limit is not None:
-                remaining = args.limit - total
-                if remaining <= 0:
-                    completed = True
-                    break
-                images = images[:remaining]
-
-            if not images:
-                completed = "continue" not in payload
-                break
-
-            for entry in images:
-                entry["descriptionurl"] = entry.get(
-                    "descriptionurl",
-                    f"https://{args.wiki}.fandom.com/wiki/"
-                    f"{urllib.parse.quote(entry['title'].replace(' ', '_'), safe=':/%')}",
-                )
-
-            chunk_path = tmp_dir / f"chunk-{chunk_idx:05d}.json"
-            chunk_path.write_text(json.dumps(images, indent=2), encoding="utf-8")
-            chunk_idx += 1
-            total += len(images)
-            if chunk_idx % 10 == 0:
-                print(f"...chunk {chunk_idx} written ({total} media so far)")
-
-            if args.limit is not None and total >= args.limit:
-                completed = True
-                break
 
-            if "continue" not in payload:
-                completed = True
-                break
+    async def run() -> None:
+        nonlocal chunk_idx, total
+        async with (
+            _api_client() as client,
+            aclosing(iter_all_images(args.wiki, client, cache)) as batches,
+        ):
+            async for images in batches:
+                if args.limit is not None:
+                    remaining = args.limit - total
+                    if remaining <= 0:
+                        return
+                    images = images[:remaining]
 
-            cont = payload["continue"]
-            time.sleep(random.uniform(*MEDIA_DELAY_RANGE))
+                if not images:
+                    continue
 
-    if not completed:
-        print(
-            f"Stopped after {total} media entries; partial chunks left in {tmp_dir} for inspection."
-        )
-        return
+                records = []
+                for entry in images:
+                    # Copy before adding fields: the API payload may be shared
+                    # with the response cache.
+                    record = dict(entry)
+                    if "descriptionurl" not in record:
+                        record["descriptionurl"] = _wiki_url(url_prefix, record["title"])
+                    record["dest_filename"] = _dest_filename(record)
+                    records.append(record)
+
+                chunk_path = tmp_dir / f"chunk-{chunk_idx:05d}.jsonl"
+                chunk_path.write_bytes(
+                    b"".join(_json_dumps(record, indent=False) + b"\n" for record in records)
+                )
+                chunk_idx += 1
+                total += len(images)
+                if chunk_idx % 10 == 0:
+                    print(f"...chunk {chunk_idx} written ({total} media so far)")
 
-    media: List[Dict[str, str]] = []
-    for chunk_file in sorted(tmp_dir.glob("chunk-*.json")):
-        media.extend(json.loads(chunk_file.read_text(encoding="utf-8")))
+                if args.limit is not None and total >= args.limit:
+                    return
 
-    out_file = out_dir / "all_media_urls.json"
-    out_file.write_text(json.dumps(media, indent=2), encoding="utf-8")
+    try:
+        asyncio.run(run())
+    except BaseException as exc:
+        cache.save(prune=False)
+        if isinstance(exc, (httpx.HTTPError, ApiLagError)):
+            print(
+                f"Stopped after {total} media entries; partial chunks left in {tmp_dir} for inspection."
+            )
+        raise
+    cache.save(prune=args.limit is None)
+
+    # Chunks are already one entry per line, so merging is a plain byte concat.
+    out_file = out_dir / MEDIA_MANIFEST
+    tmp_file = out_file.with_suffix(out_file.suffix + ".part")
+    with tmp_file.open("wb") as out:
+        for chunk_file in sorted(tmp_dir.glob("chunk-*.jsonl")):
+            with chunk_file.open("rb") as chunk:
+                shutil.copyfileobj(chunk, out)
+    tmp_file.replace(out_file)
     shutil.rmtree(tmp_dir)
-    print(f"Wrote {len(media)} media entries to {out_file}")
+    print(f"Wrote {total} media entries to {out_file}")
 
 
 def _dir_size_bytes(path: Path) -> int:
     if not path.exists():
         return 0
+    # scandir hands back cached type info, so each file costs one stat at most.
     total = 0
-    for file in path.rglob("*"):
-        if file.is_file():
-            total += file.stat().st_size
+    stack = [str(path)]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    total += entry.stat(follow_symlinks=False).st_size
     return total
 
 
+_BYTE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB")
+
+
 def _human_bytes(num: int) -> str:
-    step = 1024
-    for unit in ["B", "KB", "MB", "GB", "TB"]:
-        if num < step or unit == "TB":
-            return f"{num:.2f} {unit}"
-        num /= step
-    return f"{num:.2f} TB"
+    if num <= 0:
+        return f"{num:.2f} B"
+    # Each unit is 2**10 of the previous one, so the bit length picks it.
+    idx = min((int(num).bit_length() - 1) // 10, len(_BYTE_UNITS) - 1)
+    return f"{num / (1 << (10 * idx)):.2f} {_BYTE_UNITS[idx]}"
 
 
 def _format_eta(seconds: float) -> str:
@@ -191,28 +675,179 @@ def _format_eta(seconds: float) -> str:
     return f"{hours:02d}:{minutes:02d}:{secs:02d}"
 
 
-def _download_file(client: httpx.Client, url: str, dest: Path) -> int:
+def _write_all(fd: int, buffers: List[bytes]) -> None:
+    """Write every buffer to fd, coping with short writes."""
+    if not hasattr(os, "writev"):  # e.g. Windows
+        data = memoryview(b"".join(buffers))
+        while data:
+            data = data[os.write(fd, data) :]
+        return
+    views = [memoryview(buf) for buf in buffers if buf]
+    while views:
+        written = os.writev(fd, views)
+        while views and written >= len(views[0]):
+            written -= len(views.pop(0))
+        if views and written:
+            views[0] = views[0][written:]
+
+
+def _expected_total_size(resp: httpx.Response, start: int) -> int | None:
+    """Full size of the remote file implied by the response headers, if known."""
+    if resp.status_code == 206:
+        content_range = resp.headers.get("Content-Range", "")
+        _, _, total = content_range.rpartition("/")
+        return int(total) if total.isdigit() else None
+    if "Content-Encoding" in resp.headers:
+        return None
+    length = resp.headers.get("Content-Length")
+    return start + int(length) if length and length.isdigit() else None
+
+
+async def _download_file(
+    client: httpx.AsyncClient,
+    url: str,
+    dest: Path,
+    chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    delay: float = 0.0,
+    expected_sha1: str | None = None,
+    expected_size: int = 0,
+) -> int:
     tmp_path = dest.with_suffix(dest.suffix + ".part")
-    with client.stream("GET", url, follow_redirects=True) as resp:
-        resp.raise_for_status()
-        with tmp_path.open("wb") as fh:
-            for chunk in resp.iter_bytes():
-                fh.write(chunk)
+    # Pick up where an interrupted attempt left off instead of starting over.
+    start = tmp_path.stat().st_size if tmp_path.exists() else 0
+    headers = {"Range": f"bytes={start}-"} if start else None
+    request = client.build_request("GET", url, headers=headers)
+    send = client.send(request, stream=True, follow_redirects=True)
+    if delay:
+        # Spend the polite delay waiting on the connection and response
+        # headers rather than idling before the request is even sent.
+        resp, _ = await asyncio.gather(send, asyncio.sleep(delay))
+    else:
+        resp = await send
+    try:
+        if resp.status_code == 416:
+            # The partial file no longer lines up with the remote one.
+            restart = True
+        else:
+            restart = False
+            resp.raise_for_status()
+            if resp.status_code != 206 or not resp.headers.get(
+                "Content-Range", ""
+            ).startswith(f"bytes {start}-"):
+                start = 0  # server sent the whole file
+            expected = _expected_total_size(resp, start)
+            digest = hashlib.sha1(usedforsecurity=False)
+            if start:
+                with tmp_path.open("rb") as existing:
+                    while block := existing.read(chunk_size):
+                        digest.update(block)
+            # Write through a raw fd, gathering a few chunks per writev call
+            # instead of one buffered write per chunk.
+            fd = os.open(
+                tmp_path,
+                os.O_WRONLY
+                | os.O_CREAT
+                | (0 if start else os.O_TRUNC)
+                | getattr(os, "O_BINARY", 0),  # no newline translation on Windows
+                0o644,
+            )
+            written = start
+            preallocated = False
+            total_size = expected or expected_size
+            if not start and total_size and hasattr(os, "posix_fallocate"):
+                # Reserve the whole extent up front: fewer metadata updates and
+                # less fragmentation than growing the file 1 MiB at a time.
+                try:
+                    os.posix_fallocate(fd, 0, total_size)
+                    preallocated = True
+                except OSError:
+                    pass
+            try:
+                os.lseek(fd, start, os.SEEK_SET)
+                pending: List[bytes] = []
+                pending_bytes = 0
+                try:
+                    async for chunk in resp.aiter_bytes(chunk_size=chunk_size):
+                        digest.update(chunk)
+                        pending.append(chunk)
+                        pending_bytes += len(chunk)
+                        if pending_bytes >= DOWNLOAD_WRITE_BATCH:
+                            batch, pending = pending, []
+                            batch_bytes, pending_bytes = pending_bytes, 0
+                            _write_all(fd, batch)
+                            written += batch_bytes
+                finally:
+                    # Also keep chunks that arrived before a dropped connection;
+                    # a resume re-hashes the whole .part, so they stay usable.
+                    _write_all(fd, pending)
+                    written += pending_bytes
+            finally:
+                if preallocated:
+                    # Drop the unused reservation so the .part size stays a
+                    # valid resume offset if the transfer stopped early.
+                    os.ftruncate(fd, written)
+                os.close(fd)
+    finally:
+        await resp.aclose()
+    if restart:
+        tmp_path.unlink(missing_ok=True)
+        return await _download_file(
+            client,
+            url,
+            dest,
+            chunk_size,
+            expected_sha1=expected_sha1,
+            expected_size=expected_size,
+        )
+    size = tmp_path.stat().st_size
+    if expected is not None and size != expected:
+        if size > expected:
+            tmp_path.unlink()  # cannot be resumed from; start fresh next time
+        raise DownloadIncompleteError(url, size, expected)
+    if expected_sha1 and digest.hexdigest() != expected_sha1.lower():
+        tmp_path.unlink()
+        raise DownloadChecksumError(url, expected_sha1, digest.hexdigest())
     tmp_path.replace(dest)
-    return dest.stat().st_size
-
-
-def _download_with_backoff(client: httpx.Client, url: str, dest: Path) -> int:
+    return size
+
+
+async def _download_with_backoff(
+    client: httpx.AsyncClient,
+    url: str,
+    dest: Path,
+    chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    polite_delay: float = 0.0,
+    expected_sha1: str | None = None,
+    expected_size: int = 0,
+) -> int:
     delay = 5.0
     attempt = 1
+    checksum_failures = 0
     while True:
         try:
-            return _download_file(client, url, dest)
+            return await _download_file(
+                client,
+                url,
+                dest,
+                chunk_size,
+                polite_delay if attempt == 1 else 0.0,
+                expected_sha1,
+                expected_size,
+            )
         except httpx.HTTPStatusError as exc:
             status = exc.response.status_code
             if status == 404:
                 raise DownloadNotFoundError(url) from None
             msg = f"HTTP {status}"
+        except DownloadChecksumError as exc:
+            # A file re-uploaded since the manifest was built will never match;
+            # give up on it rather than backing off until the run aborts.
+            checksum_failures += 1
+            if checksum_failures > CHECKSUM_RETRIES:
+                raise
+            msg = str(exc)
+        except DownloadIncompleteError as exc:
+            msg = str(exc)
         except httpx.HTTPError as exc:
             msg = f"Network error: {exc}"
         except Exception as exc:  # pylint: disable=broad-exception-caught
@@ -225,44 +860,117 @@ def _download_with_backoff(client: httpx.Client, url: str, dest: Path) -> int:
             raise RuntimeError(
                 "Backoff exceeded 2 hours between attempts; aborting downloads."
             ) from None
-        time.sleep(delay)
+        await asyncio.sleep(delay)
         delay = min(delay * 2, MAX_BACKOFF_SECONDS)
         attempt += 1
 
 
-def _destination_for_entry(media_dir: Path, entry: Dict[str, Any]) -> Path:
+def _dest_filename(entry: Dict[str, Any]) -> str:
     name = entry.get("name") or entry.get("title", "file")
     sanitized = str(name).replace(" ", "_")
     sha1 = entry.get("sha1")
-    filename = f"{sha1}_{sanitized}" if sha1 else sanitized
-    return media_dir / filename
+    return f"{sha1}_{sanitized}" if sha1 else sanitized
+
+
+def _destination_for_entry(media_dir: Path, entry: Dict[str, Any]) -> Path:
+    return media_dir / (entry.get("dest_filename") or _dest_filename(entry))
+
+
+def _find_manifest(base_dir: Path) -> Path | None:
+    for name in (MEDIA_MANIFEST, LEGACY_MEDIA_MANIFEST):
+        manifest = base_dir / name
+        if manifest.exists():
+            return manifest
+    return None
+
+
+def _iter_manifest(manifest: Path, fh: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    """Yield manifest entries one at a time instead of loading the whole file."""
+    if manifest.suffix == ".jsonl":
+        return (_json_loads(line) for line in fh if line.strip())
+    return ijson.items(fh, "item", use_float=True)
+
+
+def _count_manifest_entries(manifest: Path) -> int:
+    with manifest.open("rb") as fh:
+        if manifest.suffix == ".jsonl":
+            return sum(1 for line in fh if line.strip())
+        return sum(
+            1
+            for prefix, event, _ in ijson.parse(fh)
+            if prefix == "item" and event == "start_map"
+        )
+
+
+def _load_failed_urls(failures_path: Path) -> Set[str]:
+    if not failures_path.exists():
+        return set()
+    failed: Set[str] = set()
+    with failures_path.open(encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                failed.add(json.loads(line)["url"])
+    return failed
+
+
+def _record_failure(fh: IO[str], url: str, status: int | str) -> None:
+    fh.write(json.dumps({"url": url, "failure": status}) + "\n")
+    fh.flush()
+
+
+def _existing_media_names(media_dir: Path) -> Set[str]:
+    return set(os.listdir(media_dir))
 
 
 def _get_next_pending_entry(
-    media_entries: List[Dict[str, Any]], media_dir: Path
+    media_entries: Iterable[Dict[str, Any]],
+    media_dir: Path,
+    failed_urls: Set[str] | None = None,
+    existing_names: Set[str] | None = None,
 ) -> tuple[Dict[str, Any], Path] | None:
+    if existing_names is None:
+        existing_names = _existing_media_names(media_dir)
     for entry in media_entries:
         url = entry.get("url")
         if not url:
             continue
         if entry.get("failure") is not None:
             continue
+        if failed_urls and url in failed_urls:
+            continue
         dest = _destination_for_entry(media_dir, entry)
-        if dest.exists():
+        if dest.name in existing_names:
             continue
         return entry, dest
     return None
 
 
+_last_disk_usage_time: float | None = None
+_last_disk_usage_free = 0
+
+
+def _free_bytes(path: Path) -> int:
+    global _last_disk_usage_time, _last_disk_usage_free
+    now = time.monotonic()
+    if (
+        _last_disk_usage_time is None
+        or now - _last_disk_usage_time > DISK_USAGE_INTERVAL
+    ):
+        _last_disk_usage_free = shutil.disk_usage(path).free
+        _last_disk_usage_time = now
+    return _last_disk_usage_free
+
+
 def _log_download_progress(
     media_dir: Path,
     completed_entries: int,
     total_entries: int,
     bytes_on_disk: int,
+    concurrency: int = 1,
 ) -> None:
     percent = (completed_entries / total_entries) * 100 if total_entries else 0.0
-    eta_seconds = max(total_entries - completed_entries, 0) * 11
-    free_bytes = shutil.disk_usage(media_dir).free
+    eta_seconds = max(total_entries - completed_entries, 0) * 11 / max(concurrency, 1)
+    free_bytes = _free_bytes(media_dir)
     print(
         f"[download-media] {completed_entries}/{total_entries} entries ({percent:.2f}%); "
         f"{_human_bytes(bytes_on_disk)} stored in {media_dir}; "
@@ -277,88 +985,149 @@ def _log_download_progress(
 def command_download_media(args: argparse.Namespace) -> None:
     wiki = args.wiki
     base_dir = Path("fandom-data") / wiki
-    manifest = base_dir / "all_media_urls.json"
-    if not manifest.exists():
+    manifest = _find_manifest(base_dir)
+    if manifest is None:
         print(
-            f"[download-media] Manifest not found at {manifest}. "
+            f"[download-media] Manifest not found at {base_dir / MEDIA_MANIFEST}. "
             "Run 'all-media' first."
         )
         raise SystemExit(1)
 
-    media = json.loads(manifest.read_text(encoding="utf-8"))
-    if not isinstance(media, list) or not media:
+    total_entries = _count_manifest_entries(manifest)
+    if not total_entries:
         print(f"[download-media] Manifest at {manifest} is empty; nothing to download.")
         return
     if args.limit:
-        media = media[: args.limit]
+        total_entries = min(total_entries, args.limit)
 
-    total_entries = len(media)
+    failures_path = base_dir / "all_media_failures.jsonl"
+    failed_urls = _load_failed_urls(failures_path)
+    concurrency = max(1, args.concurrency)
     media_dir = base_dir / "media"
     media_dir.mkdir(parents=True, exist_ok=True)
     bytes_on_disk = _dir_size_bytes(media_dir)
+    # One directory listing up front instead of an exists() stat per entry.
+    existing_names = _existing_media_names(media_dir)
     print(
         f"[download-media] Starting download for {total_entries} files on {wiki}. "
-        f"Random delay {DOWNLOAD_DELAY_RANGE[0]:.0f}-{DOWNLOAD_DELAY_RANGE[1]:.0f}s between downloads; "
+        f"{concurrency} concurrent downloads, each waiting "
+        f"{DOWNLOAD_DELAY_RANGE[0]:.0f}-{DOWNLOAD_DELAY_RANGE[1]:.0f}s between files; "
         f"logging every {DOWNLOAD_LOG_INTERVAL} downloads. Saving under {media_dir}."
     )
 
-    headers = {"User-Agent": "fandom-cli/0.1 (+https://github.com/user/project)"}
+    # Media is stored byte-for-byte: ask for the raw representation so Range
+    # offsets, Content-Length and the SHA-1 all refer to the file itself.
+    headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "identity"}
     completed_entries = 0
     downloaded_files = 0
     downloads_since_log = 0
     client_timeout = httpx.Timeout(120.0, connect=30.0)
 
-    try:
-        with httpx.Client(timeout=client_timeout, headers=headers) as client:
-            for entry in media:
-                completed_entries += 1
-                url = entry.get("url")
-                if not url:
-                    continue
-                if entry.get("failure") is not None:
-                    continue
-                dest = _destination_for_entry(media_dir, entry)
-                if dest.exists():
-                    continue
-                if downloaded_files > 0:
-                    time.sleep(random.uniform(*DOWNLOAD_DELAY_RANGE))
-                try:
-                    size = _download_with_backoff(client, url, dest)
-                except DownloadNotFoundError:
-                    entry["failure"] = 404
-                    manifest.write_text(json.dumps(media, indent=2), encoding="utf-8")
-                    print(
-                        "[download-media] Recorded 404 for this entry; it will be skipped:"
-                    )
+    def count_entries(entries: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        nonlocal completed_entries
+        for entry in entries:
+            completed_entries += 1
+            yield entry
+
+    async def worker(
+        client: httpx.AsyncClient,
+        entries: Iterator[Dict[str, Any]],
+        failures: IO[str],
+    ) -> None:
+        nonlocal downloaded_files, downloads_since_log, bytes_on_disk
+        worker_downloads = 0
+        while True:
+            pending = _get_next_pending_entry(
+                entries, media_dir, failed_urls, existing_names
+            )
+            if pending is None:
+                return
+            entry, dest = pending
+            url = entry["url"]
+            # Claim the name before awaiting so a duplicate manifest entry picked
+            # up by another worker is not fetched twice.
+            existing_names.add(dest.name)
+            polite_delay = (
+                random.uniform(*DOWNLOAD_DELAY_RANGE) if worker_downloads > 0 else 0.0
+            )
+            worker_downloads += 1
+            # Leftover .part bytes were already counted by _dir_size_bytes.
+            part_path = dest.with_suffix(dest.suffix + ".part")
+            resumed = part_path.stat().st_size if part_path.exists() else 0
+            try:
+                size = await _download_with_backoff(
+                    client,
+                    url,
+                    dest,
+                    polite_delay=polite_delay,
+                    expected_sha1=entry.get("sha1"),
+                    expected_size=int(entry.get("size") or 0),
+                )
+            except DownloadNotFoundError:
+                failed_urls.add(url)
+                _record_failure(failures, url, 404)
+                print("[download-media] Recorded 404 for this entry; it will be skipped:")
+                print(json.dumps(entry, indent=2, sort_keys=True))
+                print(f"[download-media] Intended destination: {dest}")
+                continue
+            except DownloadChecksumError as exc:
+                failed_urls.add(url)
+                _record_failure(failures, url, "sha1")
+                print(f"[download-media] {exc}")
+                print("[download-media] Recorded SHA-1 mismatch for this entry; it will be skipped:")
+                print(json.dumps(entry, indent=2, sort_keys=True))
+                print(f"[download-media] Intended destination: {dest}")
+                continue
+            except RuntimeError as exc:
+                if "aborting downloads" in str(exc).lower():
+                    print("[download-media] Download aborted while fetching this entry:")
                     print(json.dumps(entry, indent=2, sort_keys=True))
                     print(f"[download-media] Intended destination: {dest}")
-                    continue
-                except RuntimeError as exc:
-                    if "aborting downloads" in str(exc).lower():
-                        print(
-                            "[download-media] Download aborted while fetching this entry:"
-                        )
-                        print(json.dumps(entry, indent=2, sort_keys=True))
-                        print(f"[download-media] Intended destination: {dest}")
-                    print(f"[download-media] {exc}")
-                    return
-                downloaded_files += 1
-                downloads_since_log += 1
-                bytes_on_disk += size
-                if downloads_since_log >= DOWNLOAD_LOG_INTERVAL:
-                    try:
-                        _log_download_progress(
-                            media_dir, completed_entries, total_entries, bytes_on_disk
-                        )
-                    except RuntimeError as exc:
-                        print(f"[download-media] {exc}")
-                        return
-                    downloads_since_log = 0
+                raise
+            downloaded_files += 1
+            downloads_since_log += 1
+            bytes_on_disk += size - resumed
+            if downloads_since_log >= DOWNLOAD_LOG_INTERVAL:
+                downloads_since_log = 0
+                _log_download_progress(
+                    media_dir, completed_entries, total_entries, bytes_on_disk, concurrency
+                )
+
+    async def run(entries: Iterator[Dict[str, Any]], failures: IO[str]) -> None:
+        async with httpx.AsyncClient(
+            timeout=client_timeout,
+            headers=headers,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=concurrency, max_keepalive_connections=concurrency
+            ),
+        ) as client:
+            workers = [
+                asyncio.create_task(worker(client, entries, failures))
+                for _ in range(concurrency)
+            ]
+            try:
+                await asyncio.gather(*workers)
+            except BaseException:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                raise
+
+    try:
+        with manifest.open("rb") as fh, failures_path.open("a", encoding="utf-8") as failures:
+            # Workers pull from one shared iterator so at most `concurrency` files
+            # are in flight; asyncio only switches tasks at awaits, so next() is safe.
+            entries = itertools.islice(_iter_manifest(manifest, fh), args.limit or None)
+            asyncio.run(run(count_entries(entries), failures))
+    except RuntimeError as exc:
+        print(f"[download-media] {exc}")
+        return
     finally:
         if downloads_since_log:
             try:
                 _log_download_progress(
-                    media_dir, completed_entries, total_entries, bytes_on_disk
+                    media_dir, completed_entries, total_entries, bytes_on_disk, concurrency
                 )
             except RuntimeError as exc:
                 print(f"[download-media] {exc}")
@@ -374,27 +1143,29 @@ def command_download_media(args: argparse.Namespace) -> None:
 def command_view_next_download(args: argparse.Namespace) -> None:
     wiki = args.wiki
     base_dir = Path("fandom-data") / wiki
-    manifest = base_dir / "all_media_urls.json"
-    if not manifest.exists():
+    manifest = _find_manifest(base_dir)
+    if manifest is None:
         print(
-            f"[view-next-download] Manifest not found at {manifest}. "
+            f"[view-next-download] Manifest not found at {base_dir / MEDIA_MANIFEST}. "
             "Run 'all-media' first."
         )
         raise SystemExit(1)
 
-    media = json.loads(manifest.read_text(encoding="utf-8"))
-    if not isinstance(media, list) or not media:
-        print(
-            f"[view-next-download] Manifest at {manifest} is empty; nothing to inspect."
-        )
-        return
-    if args.limit:
-        media = media[: args.limit]
-
     media_dir = base_dir / "media"
     media_dir.mkdir(parents=True, exist_ok=True)
-
-    pending = _get_next_pending_entry(media, media_dir)
+    failed_urls = _load_failed_urls(base_dir / "all_media_failures.jsonl")
+
+    with manifest.open("rb") as fh:
+        media = itertools.islice(_iter_manifest(manifest, fh), args.limit or None)
+        first = next(media, None)
+        if first is None:
+            print(
+                f"[view-next-download] Manifest at {manifest} is empty; nothing to inspect."
+            )
+            return
+        pending = _get_next_pending_entry(
+            itertools.chain([first], media), media_dir, failed_urls
+        )
     if not pending:
         print(
             f"[view-next-download] All entries up to current limit already exist in {media_dir}."
@@ -415,6 +1186,22 @@ def build_parser() -> argparse.ArgumentParser:
 
     all_pages = sub.add_parser("all-pages", help="Fetch every content page URL for a wiki.")
     all_pages.add_argument("wiki", help="Subdomain of the Fandom wiki, e.g. 'rezero'")
+    all_pages.add_argument(
+        "--finalize-json",
+        action="store_true",
+        help=f"Also write {PAGE_LIST_JSON} as a single JSON array.",
+    )
+    all_pages.add_argument(
+        "--pretty",
+        action="store_true",
+        help="Indent the --finalize-json output (compact by default).",
+    )
+    all_pages.add_argument(
+        "--concurrency",
+        type=int,
+        default=PAGE_SHARD_CONCURRENCY,
+        help=f"Number of title ranges to page through in parallel (default {PAGE_SHARD_CONCURRENCY}).",
+    )
     all_pages.set_defaults(func=command_all_pages)
 
     all_media = sub.add_parser(
@@ -431,7 +1218,7 @@ def build_parser() -> argparse.ArgumentParser:
 
     download_media = sub.add_parser(
         "download-media",
-        help="Download every media asset listed in all_media_urls.json for a wiki.",
+        help="Download every media asset listed in all_media_urls.jsonl for a wiki.",
     )
     download_media.add_argument("wiki", help="Subdomain of the Fandom wiki, e.g. 'rezero'")
     download_media.add_argument(
@@ -440,6 +1227,12 @@ def build_parser() -> argparse.ArgumentParser:
         default=None,
         help="Optional cap on number of manifest entries to download.",
     )
+    download_media.add_argument(
+        "--concurrency",
+        type=int,
+        default=DOWNLOAD_CONCURRENCY,
+        help=f"Number of files to download in parallel (default {DOWNLOAD_CONCURRENCY}).",
+    )
     download_media.set_defaults(func=command_download_media)
 
     view_next = sub.add_parser(
@@ -467,6 +1260,8 @@ def main(argv: List[str] | None = None) -> int:
         parser.error(f"HTTP {exc.response.status_code}: {exc.request.url}")
     except httpx.HTTPError as exc:
         parser.error(f"Network error: {exc}")
+    except ApiLagError as exc:
+        parser.error(f"Server lagged: {exc}")
     return 0
 
 